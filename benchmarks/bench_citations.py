@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark rendering citations with and without reusing rendered citations
+
+Run from the project root:
+    python benchmarks/bench_citations.py --style harvard-cite-them-right
+"""
+from argparse import ArgumentParser
+import copy
+import json
+import os.path
+import random
+import time
+from typing import Callable
+
+from md_preprocessor.bibliography.citations import CitationMatch, \
+    CitationReplacer
+from md_preprocessor.bibliography.styles import load_style
+
+_ROOT_PATH = os.path.abspath(os.path.dirname(__file__))
+_BIBLIOGRAPHY_PATH = os.path.join(_ROOT_PATH, '..', 'tests',
+                                  'test_bibliography', 'fixtures',
+                                  'bibliography.json')
+
+
+def make_bibliography(size: int) -> list[dict]:
+    """
+    Build a bibliography of the given size by copying the test fixture
+    :param size: number of entries
+    :return: bibliography in CSL-JSON format
+    """
+    with open(_BIBLIOGRAPHY_PATH, 'r', encoding='utf-8') as fh:
+        fixture = json.load(fh)
+    bibliography = []
+    for i in range(size):
+        entry = copy.deepcopy(fixture[i % len(fixture)])
+        entry['id'] = f"{entry['id']}{i}"
+        bibliography.append(entry)
+    return bibliography
+
+
+def make_scenarios(keys: list[str],
+                   n_citations: int,
+                   ) -> dict[str, list[list[str]]]:
+    """
+    Build citation sequences, from best to worst case for reusing citations
+    :param keys: keys in the bibliography
+    :param n_citations: number of citations per scenario
+    :return: citations (lists of keys) by scenario name
+    """
+    rng = random.Random(0)
+    return {
+        'same key': [[keys[0]]] * n_citations,
+        'random key': [[rng.choice(keys)] for _ in range(n_citations)],
+        'random key tuple': [rng.sample(keys, rng.randint(1, 3))
+                             for _ in range(n_citations)],
+        'distinct keys': [[key] for key in keys[:n_citations]],
+    }
+
+
+def timeit(function: Callable[[], None], repeat: int) -> float:
+    """
+    Time a function
+    :param function: function to time
+    :param repeat: number of runs
+    :return: fastest run in seconds
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    """Print timings per scenario"""
+    parser = ArgumentParser()
+    parser.add_argument('--style', default='harvard-cite-them-right',
+                        help="CSL style name or path")
+    parser.add_argument('--bibliography-size', type=int, default=1000)
+    parser.add_argument('--citations', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    try:
+        load_style(args.style)
+    except ValueError as e:
+        parser.error(str(e))
+
+    bibliography = make_bibliography(args.bibliography_size)
+    keys = [entry['id'] for entry in bibliography]
+    scenarios = make_scenarios(keys, args.citations)
+
+    print(f"{'scenario':<20}{'citeproc [s]':>14}{'reuse [s]':>12}"
+          f"{'speedup':>10}")
+    for name, citations in scenarios.items():
+        def render(reuse_citations: bool, citations=citations) -> None:
+            replacer = CitationReplacer(bibliography,
+                                        style_name=args.style,
+                                        reuse_citations=reuse_citations)
+            for ref_ids in citations:
+                replacer.replace(CitationMatch(ref_ids, False))
+            replacer.render_bibliography()
+
+        baseline = timeit(lambda: render(False), args.repeat)
+        reused = timeit(lambda: render(True), args.repeat)
+        print(f"{name:<20}{baseline:>14.3f}{reused:>12.3f}"
+              f"{baseline / reused:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,546 @@
+"""Streaming BibTeX reader converting entries to CSL-JSON"""
+import dataclasses
+import hashlib
+import json
+import os
+from typing import Iterable, TextIO
+import unicodedata
+import warnings
+
+import regex as re
+
+from md_preprocessor.bibliography.utils import JSON
+
+_CHUNK_SIZE = 1 << 20
+_CACHE_VERSION = 2
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+    'md-preprocessor',
+)
+
+# BibTeX entry type -> CSL type
+_TYPES = {
+    'article': 'article-journal',
+    'book': 'book',
+    'booklet': 'pamphlet',
+    'conference': 'paper-conference',
+    'inbook': 'chapter',
+    'incollection': 'chapter',
+    'inproceedings': 'paper-conference',
+    'manual': 'report',
+    'mastersthesis': 'thesis',
+    'misc': 'article',
+    'online': 'webpage',
+    'patent': 'patent',
+    'phdthesis': 'thesis',
+    'proceedings': 'book',
+    'techreport': 'report',
+    'thesis': 'thesis',
+    'unpublished': 'manuscript',
+    'www': 'webpage',
+}
+_GENRES = {
+    'mastersthesis': "Master's thesis",
+    'phdthesis': 'PhD thesis',
+}
+# BibTeX field -> CSL variable, for fields copied verbatim
+_VARIABLES = {
+    'abstract': 'abstract',
+    'address': 'publisher-place',
+    'chapter': 'chapter-number',
+    'edition': 'edition',
+    'institution': 'publisher',
+    'isbn': 'ISBN',
+    'issn': 'ISSN',
+    'journal': 'container-title',
+    'journaltitle': 'container-title',
+    'location': 'publisher-place',
+    'note': 'note',
+    'number': 'issue',
+    'organization': 'publisher',
+    'publisher': 'publisher',
+    'school': 'publisher',
+    'series': 'collection-title',
+    'title': 'title',
+    'volume': 'volume',
+}
+# BibTeX field -> CSL variable, for fields that are not LaTeX text
+_VERBATIM_VARIABLES = {
+    'doi': 'DOI',
+    'url': 'URL',
+}
+_CONTAINER_TYPES = frozenset(('inbook', 'incollection', 'inproceedings',
+                              'conference'))
+_MONTHS = ('jan', 'feb', 'mar', 'apr', 'may', 'jun',
+           'jul', 'aug', 'sep', 'oct', 'nov', 'dec')
+_MONTH_MACROS = {
+    abbrev: name
+    for abbrev, name in zip(_MONTHS, (
+        'January', 'February', 'March', 'April', 'May', 'June', 'July',
+        'August', 'September', 'October', 'November', 'December'))
+}
+_ACCENTS = {
+    '"': '\u0308', "'": '\u0301', '`': '\u0300', '^': '\u0302',
+    '~': '\u0303', '=': '\u0304', '.': '\u0307', 'c': '\u0327',
+    'u': '\u0306', 'v': '\u030c', 'H': '\u030b', 'r': '\u030a',
+}
+_SYMBOLS = {
+    'aa': 'å', 'AA': 'Å', 'ae': 'æ', 'AE': 'Æ', 'i': 'ı', 'l': 'ł',
+    'L': 'Ł', 'o': 'ø', 'O': 'Ø', 'oe': 'œ', 'OE': 'Œ', 'ss': 'ß',
+}
+
+# Patterns
+_ENTRY_START = re.compile(r'@\s*(?P<type>[a-zA-Z]+)\s*(?P<open>[{(])')
+_BRACES = re.compile(r'[{}]')
+_BRACES_OR_PAREN = re.compile(r'[{})"]')
+_FIELD_NAME = re.compile(r'\s*(?P<name>[^\s=,{}"#]+)\s*=\s*')
+_BARE_VALUE = re.compile(r'[^\s,#{}"]+')
+_CONCAT = re.compile(r'\s*#\s*')
+_SEPARATOR = re.compile(r'\s*(?:,|$)')
+_ACCENT_PATTERN = re.compile(r'\\(?P<accent>["\'`^~=.])\s*'
+                             r'(?:\{(?P<char1>\w)\}|(?P<char2>\w))'
+                             r'|\\(?P<accent>[cuvHr])'
+                             r'(?:\s*\{(?P<char1>\w)\}|\s+(?P<char2>\w))')
+_SYMBOL_PATTERN = re.compile(r'\\(?P<symbol>aa|AA|ae|AE|oe|OE|ss|[iloOL])'
+                             r'(?![a-zA-Z])\s*')
+_ESCAPE_PATTERN = re.compile(r'\\(?P<char>[&%$#_{}])|[{}]')
+_VERBATIM_ESCAPE_PATTERN = re.compile(r'\\(?P<char>[_%])')
+_FORMAT_PATTERN = re.compile(r'\\(?:emph|text(?:it|bf|sc|tt|rm|sf)|mathrm)'
+                             r'(?![a-zA-Z])\s*')
+_NAME_SEPARATOR = re.compile(r'\s+and\s+', re.IGNORECASE)
+_DATE_PATTERN = re.compile(r'(?P<year>\d{4})(?:-(?P<month>\d{1,2})'
+                           r'(?:-(?P<day>\d{1,2}))?)?')
+
+
+@dataclasses.dataclass
+class BibTeXEntry:
+    """A raw BibTeX entry, fields are parsed on demand"""
+
+    entry_type: str
+    key: str
+    body: str
+
+    def fields(self, macros: dict[str, str] | None = None) -> dict[str, str]:
+        """
+        Parse the fields of this entry
+        :param macros: @string macros defined in the BibTeX file
+        :return: field values with lower-case field names
+        """
+        return _parse_fields(self.body, macros or {})
+
+
+def iter_bibtex_entries(fh: TextIO,
+                        chunk_size: int = _CHUNK_SIZE,
+                        ) -> Iterable[BibTeXEntry]:
+    """
+    Read entries from a BibTeX file without loading it into memory at once.
+    @string, @preamble and @comment entries are yielded as well.
+    :param fh: BibTeX file handle
+    :param chunk_size: number of characters to read at once
+    :return: iterable over entries
+    """
+    buffer, pos, eof = '', 0, False
+    while True:
+        match = _ENTRY_START.search(buffer, pos)
+        end = match and _find_entry_end(buffer, match)
+        if end is not None:
+            entry_type = match.group('type').lower()
+            body = buffer[match.end():end - 1]
+            key, _, fields = (body.partition(',')
+                              if entry_type not in ('string', 'preamble',
+                                                    'comment')
+                              else ('', '', body))
+            yield BibTeXEntry(entry_type, key.strip(), fields)
+            pos = end
+            continue
+
+        if eof:
+            if match is not None:
+                warnings.warn(f"Unterminated BibTeX entry at "
+                              f"'{buffer[match.start():match.start() + 40]}'"
+                              f". This entry is ignored.")
+            return
+        # keep the unfinished entry, or a potentially split entry start
+        keep_from = (match.start() if match is not None
+                     else buffer.rfind('@', pos))
+        buffer = buffer[keep_from:] if keep_from >= 0 else ''
+        pos = 0
+        chunk = fh.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+
+
+def read_bibtex_bibliography(path: str,
+                             keys: Iterable[str] | None = None,
+                             cache_dir: str | None = DEFAULT_CACHE_DIR,
+                             ) -> JSON:
+    """
+    Read BibTeX bibliography from file and convert it to CSL-JSON
+    :param path: path to bibliography file
+    :param keys: only convert the entries with these keys (case-insensitive),
+                 all entries if None
+    :param cache_dir: directory to cache converted entries in, no caching if
+                      None
+    :return: bibliography in CSL-JSON format
+    """
+    keys = None if keys is None else {key.lower() for key in keys}
+    if keys is not None and not keys:
+        return []
+    cache = _BibTeXCache(path, cache_dir) if cache_dir else None
+    if cache is not None and cache.covers(keys):
+        return cache.select(keys)
+
+    converted, complete = _convert_bibtex(path, keys)
+    if cache is None:
+        return list(converted.values())
+    cache.update(converted, keys, complete)
+    return cache.select(keys)
+
+
+def bibtex_to_csl(entry: BibTeXEntry, macros: dict[str, str]) -> JSON:
+    """
+    Convert a BibTeX entry to CSL-JSON
+    :param entry: BibTeX entry
+    :param macros: @string macros defined in the BibTeX file
+    :return: entry in CSL-JSON format
+    """
+    fields = entry.fields(macros)
+    csl = {'id': entry.key, 'type': _TYPES.get(entry.entry_type, 'article')}
+    if entry.entry_type in _GENRES:
+        csl['genre'] = _GENRES[entry.entry_type]
+    for field, variable in _VARIABLES.items():
+        if field in fields and variable not in csl:
+            csl[variable] = _latex_to_text(fields[field])
+    for field, variable in _VERBATIM_VARIABLES.items():
+        if field in fields:
+            csl[variable] = _verbatim(fields[field])
+    if 'booktitle' in fields:
+        variable = ('container-title'
+                    if entry.entry_type in _CONTAINER_TYPES
+                    else 'title')
+        csl.setdefault(variable, _latex_to_text(fields['booktitle']))
+    if entry.entry_type == 'techreport' and 'issue' in csl:
+        csl['number'] = csl.pop('issue')
+    if 'pages' in fields:
+        csl['page'] = re.sub(r'\s*-+\s*', '-', _latex_to_text(fields['pages']))
+    for role in ('author', 'editor'):
+        if role in fields:
+            csl[role] = _parse_names(fields[role])
+    issued = _parse_date(fields)
+    if issued is not None:
+        csl['issued'] = issued
+    return csl
+
+
+def _convert_bibtex(path: str,
+                    keys: set[str] | None,
+                    ) -> tuple[dict[str, JSON], bool]:
+    macros = dict(_MONTH_MACROS)
+    converted = {}
+    with open(path, 'r', encoding='utf-8') as fh:
+        for entry in iter_bibtex_entries(fh):
+            if entry.entry_type in ('preamble', 'comment'):
+                continue
+            try:
+                if entry.entry_type == 'string':
+                    macros.update(entry.fields(macros))
+                elif entry.key.lower() in converted:
+                    warnings.warn(f"Duplicate BibTeX key '{entry.key}'. Only "
+                                  f"the first entry is used.")
+                elif keys is None or entry.key.lower() in keys:
+                    converted[entry.key.lower()] = bibtex_to_csl(entry,
+                                                                 macros)
+            except ValueError as e:
+                name = entry.key or entry.body.strip()[:40]
+                warnings.warn(f"Malformed BibTeX @{entry.entry_type} entry "
+                              f"'{name}': {e}. This entry is ignored.")
+    return converted, keys is None
+
+
+class _BibTeXCache:
+    """
+    On-disk cache of converted entries of a single BibTeX file. The cache is
+    trusted while the file's mtime and size are unchanged, otherwise it is
+    only reused if the file's content hash is still the same.
+    """
+
+    def __init__(self, path: str, cache_dir: str):
+        self._path = os.path.abspath(path)
+        path_digest = hashlib.sha256(self._path.encode('utf-8')).hexdigest()
+        self._cache_path = os.path.join(cache_dir, f'{path_digest}.json')
+        self._stat = os.stat(self._path)
+        self._digest = None
+        self._data = self._load()
+
+    def covers(self, keys: set[str] | None) -> bool:
+        """
+        Check whether all requested entries are cached
+        :param keys: requested keys, all if None
+        :return: True if the cache can answer the request
+        """
+        if self._data['complete']:
+            return True
+        if keys is None:
+            return False
+        known = self._data['references'].keys() | set(self._data['absent'])
+        return keys <= known
+
+    def select(self, keys: set[str] | None) -> JSON:
+        """
+        Get cached entries
+        :param keys: requested keys, all if None
+        :return: bibliography in CSL-JSON format
+        """
+        references = self._data['references']
+        if keys is None:
+            return list(references.values())
+        return [reference for key, reference in references.items()
+                if key in keys]
+
+    def update(self,
+               converted: dict[str, JSON],
+               keys: set[str] | None,
+               complete: bool,
+               ) -> None:
+        """
+        Add converted entries to the cache and persist it
+        :param converted: converted entries by lower-case key
+        :param keys: requested keys, all if None
+        :param complete: whether converted contains all entries of the file
+        """
+        self._data['references'].update(converted)
+        self._data['complete'] = complete
+        self._data['absent'] = ([] if complete else sorted(
+            set(self._data['absent']) | (keys - converted.keys())))
+        self._save(self._data)
+
+    def _load(self) -> JSON:
+        empty = {'version': _CACHE_VERSION,
+                 'mtime': self._stat.st_mtime_ns,
+                 'size': self._stat.st_size,
+                 'sha256': None,
+                 'complete': False,
+                 'references': {},
+                 'absent': []}
+        try:
+            with open(self._cache_path, 'r', encoding='utf-8') as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            empty['sha256'] = self._file_digest()
+            return empty
+
+        if data.get('version') != _CACHE_VERSION:
+            empty['sha256'] = self._file_digest()
+            return empty
+        if (data['mtime'] == self._stat.st_mtime_ns
+                and data['size'] == self._stat.st_size):
+            return data
+        empty['sha256'] = self._file_digest()
+        if data['sha256'] == empty['sha256']:  # touched, but unchanged
+            data['mtime'] = self._stat.st_mtime_ns
+            data['size'] = self._stat.st_size
+            self._save(data)
+            return data
+        return empty
+
+    def _save(self, data: JSON) -> None:
+        try:
+            os.makedirs(os.path.dirname(self._cache_path), exist_ok=True)
+            tmp_path = f'{self._cache_path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as fh:
+                json.dump(data, fh, ensure_ascii=False)
+            os.replace(tmp_path, self._cache_path)
+        except OSError as e:
+            warnings.warn(f"Could not write BibTeX cache "
+                          f"'{self._cache_path}': {e}")
+
+    def _file_digest(self) -> str:
+        if self._digest is None:
+            sha256 = hashlib.sha256()
+            with open(self._path, 'rb') as fh:
+                for chunk in iter(lambda: fh.read(_CHUNK_SIZE), b''):
+                    sha256.update(chunk)
+            self._digest = sha256.hexdigest()
+        return self._digest
+
+
+def _find_entry_end(text: str, match: re.Match) -> int | None:
+    depth = 0
+    in_quotes = False
+    pattern = _BRACES_OR_PAREN if match.group('open') == '(' else _BRACES
+    for brace in pattern.finditer(text, match.end()):
+        char = brace.group()
+        if char == '{':
+            depth += 1
+        elif depth > 0 and char == '}':
+            depth -= 1
+        elif depth > 0:
+            continue
+        elif char == '"':  # only matched in parenthesized entries
+            in_quotes = not in_quotes
+        elif not in_quotes:  # closing delimiter of the entry
+            return brace.end()
+    return None
+
+
+def _find_closing_brace(text: str, start: int) -> int:
+    depth = 0
+    for brace in _BRACES.finditer(text, start):
+        depth += 1 if brace.group() == '{' else -1
+        if depth == 0:
+            return brace.end()
+    raise ValueError(f"Unbalanced braces in '{text[start:start + 40]}'")
+
+
+def _find_closing_quote(text: str, start: int) -> int:
+    depth = 0
+    for pos in range(start + 1, len(text)):
+        char = text[pos]
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+        elif char == '"' and depth == 0:
+            return pos + 1
+    raise ValueError(f"Unterminated string in '{text[start:start + 40]}'")
+
+
+def _parse_fields(body: str, macros: dict[str, str]) -> dict[str, str]:
+    fields = {}
+    pos = 0
+    while True:
+        name_match = _FIELD_NAME.match(body, pos)
+        if name_match is None:
+            return fields
+        pos = name_match.end()
+        parts = []
+        while True:
+            if body.startswith('{', pos):
+                end = _find_closing_brace(body, pos)
+                parts.append(body[pos + 1:end - 1])
+            elif body.startswith('"', pos):
+                end = _find_closing_quote(body, pos)
+                parts.append(body[pos + 1:end - 1])
+            else:
+                value_match = _BARE_VALUE.match(body, pos)
+                if value_match is None:
+                    break
+                end = value_match.end()
+                value = value_match.group()
+                parts.append(value if value.isdigit()
+                             else macros.get(value.lower(), value))
+            concat_match = _CONCAT.match(body, end)
+            pos = concat_match.end() if concat_match else end
+            if concat_match is None:
+                break
+        fields[name_match.group('name').lower()] = ''.join(parts)
+        separator_match = _SEPARATOR.match(body, pos)
+        if separator_match is None:
+            raise ValueError(f"Expected ',' after field "
+                             f"'{name_match.group('name')}' in "
+                             f"'{body[pos:pos + 40]}'")
+        pos = separator_match.end()
+
+
+def _latex_to_text(value: str) -> str:
+    value = _FORMAT_PATTERN.sub('', value)
+    value = _ACCENT_PATTERN.sub(
+        lambda m: (m.group('char1') or m.group('char2'))
+        + _ACCENTS[m.group('accent')],
+        value)
+    value = _SYMBOL_PATTERN.sub(lambda m: _SYMBOLS[m.group('symbol')], value)
+    value = _ESCAPE_PATTERN.sub(lambda m: m.group('char') or '', value)
+    value = ' '.join(value.split()).replace('~', '\u00a0')
+    return unicodedata.normalize('NFC', value)
+
+
+def _verbatim(value: str) -> str:
+    value = value.strip()
+    while (value.startswith('{')
+           and _find_closing_brace(value, 0) == len(value)):
+        value = value[1:-1].strip()
+    return _VERBATIM_ESCAPE_PATTERN.sub(lambda m: m.group('char'), value)
+
+
+def _split_top_level(text: str, separator: re.Pattern) -> list[str]:
+    parts, start, depth = [], 0, 0
+    for pos, char in enumerate(text):
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+        elif (depth == 0 and pos >= start
+              and (match := separator.match(text, pos))):
+            parts.append(text[start:pos])
+            start = match.end()
+    parts.append(text[start:])
+    return [part.strip() for part in parts]
+
+
+def _parse_names(value: str) -> list[JSON]:
+    names = []
+    for name in _split_top_level(value, _NAME_SEPARATOR):
+        if not name or name.lower() == 'others':
+            continue
+        if name.startswith('{') and _find_closing_brace(name, 0) == len(name):
+            names.append({'literal': _latex_to_text(name)})
+            continue
+        names.append(_parse_name(name))
+    return names
+
+
+def _parse_name(name: str) -> JSON:
+    parts = _split_top_level(name, re.compile(','))
+    if len(parts) > 1:  # "von Last, First" or "von Last, Jr, First"
+        words = parts[0].split()
+        given = parts[-1]
+        suffix = parts[1] if len(parts) > 2 else ''
+        particle_end = 0
+        while (particle_end < len(words) - 1
+               and words[particle_end][:1].islower()):
+            particle_end += 1
+        particle = words[:particle_end]
+        family = words[particle_end:]
+    else:  # "First von Last"
+        words = _split_top_level(name, re.compile(r'\s+'))
+        suffix = ''
+        particle_start = next((i for i, word in enumerate(words[:-1])
+                               if i > 0 and word[:1].islower()),
+                              len(words) - 1)
+        particle_end = particle_start
+        while (particle_end < len(words) - 1
+               and words[particle_end][:1].islower()):
+            particle_end += 1
+        given = ' '.join(words[:particle_start])
+        particle = words[particle_start:particle_end]
+        family = words[particle_end:]
+
+    csl_name = {'family': _latex_to_text(' '.join(family))}
+    if given:
+        csl_name['given'] = _latex_to_text(given)
+    if particle:
+        csl_name['non-dropping-particle'] = _latex_to_text(' '.join(particle))
+    if suffix:
+        csl_name['suffix'] = _latex_to_text(suffix)
+    return csl_name
+
+
+def _parse_date(fields: dict[str, str]) -> JSON | None:
+    if 'date' in fields:
+        match = _DATE_PATTERN.match(fields['date'].strip())
+        if match is None:
+            return {'literal': _latex_to_text(fields['date'])}
+        return {'date-parts': [[int(part) for part in match.groups()
+                                if part is not None]]}
+    if 'year' not in fields:
+        return None
+    year = _latex_to_text(fields['year'])
+    if not year.isdigit():
+        return {'literal': year}
+    date_parts = [int(year)]
+    month = _latex_to_text(fields.get('month', '')).lower()
+    if month.isdigit():
+        date_parts.append(int(month))
+    elif month[:3] in _MONTHS:
+        date_parts.append(_MONTHS.index(month[:3]) + 1)
+    return {'date-parts': [date_parts]}
@@ -5,13 +5,16 @@ import unicodedata
 import warnings
 
 from citeproc import (Citation, CitationItem, CitationStylesBibliography,
-                      CitationStylesStyle, formatter)
+                      formatter)
 from citeproc.source.json import CiteProcJSON
 from citeproc.string import MixedString
 import regex as re
 
+from md_preprocessor.bibliography.diagnostics import Diagnostics
+from md_preprocessor.bibliography.styles import load_style
 from md_preprocessor.bibliography.utils import Jinja2TemplateLoader, JSON, \
     TemplateParser
+from md_preprocessor.utils.replace import find_markdown
 
 # Unicode class for opening/closing brackets
 _UNICODE_OPEN_TYPE = unicodedata.category("(")
@@ -24,18 +27,13 @@ class CitationMatch:
 
     ref_ids: list[str]
     is_running_text: bool
+    offset: int | None = dataclasses.field(default=None, compare=False)
 
 
-class CitationReplacer:
+class CitationFinder:
     """
-    Replace Pandoc citations by HTML
+    Find Pandoc citations
     Following https://pandoc.org/MANUAL.html#citation-syntax
-
-    Currently NOT supported:
-      - Locator
-      - Prefix
-      - Suffix
-      - Suppress author
     """
 
     # Patterns
@@ -52,30 +50,20 @@ class CitationReplacer:
     _ENCLOSURE_REF = re.compile(r'^[([{（【『].*[)\]}）】』]$')
     _IN_BRACKETS_PATTERN = re.compile(r'^\[.*]$')
 
-    def __init__(self,
-                 bibliography: JSON = (),
-                 style_name: str = 'harvard1',
-                 parse_template: TemplateParser | None = None,
-                 locale: str = None,
-                 ):
+    def __init__(self, diagnostics: Diagnostics | None = None):
         """
-        :param bibliography: bibliography in CSL-JSON format
-        :param style_name: style name, cf. https://www.zotero.org/styles/
-        :param parse_template: function to parse template
-        :param locale: localization
+        :param diagnostics: collect problems here instead of warning about
+                            each of them
         """
-        bib_source = CiteProcJSON(bibliography)
-        bib_style = CitationStylesStyle(style_name,
-                                        validate=False,
-                                        locale=locale)
-        self._bibliography = CitationStylesBibliography(bib_style,
-                                                        bib_source,
-                                                        formatter.html)
+        self._diagnostics = diagnostics
+        self._offset = 0
 
-        # Templates
-        parse_template = parse_template or Jinja2TemplateLoader().get_template
-        self._render_bib = parse_template('bibliography')
-        self._render_citation = parse_template('citation')
+    def set_offset(self, offset: int | None) -> None:
+        """
+        Set the position of the text passed to the next find call
+        :param offset: character offset in the document, None if unknown
+        """
+        self._offset = offset
 
     def find(self, text: str) -> Iterable[tuple[CitationMatch, int, int]]:
         """
@@ -89,16 +77,73 @@ class CitationReplacer:
             for sub_match in self._REF_ID_PATTERN.finditer(match.group("all")):
                 ref_ids.append(sub_match.group("ref_id"))
 
+            offset = (None if self._offset is None
+                      else self._offset + match.start())
             if not ref_ids:
-                warnings.warn(f"Found no ref ID in '{matched_text}'. Please "
-                              f"make sure, the pattern is correct. This match "
-                              f"is ignored.")
+                self._report_unparsable(matched_text, offset)
             else:
                 is_running_text = self._is_in_parentheses(matched_text)
-                yield (CitationMatch(ref_ids, is_running_text),
+                yield (CitationMatch(ref_ids, is_running_text, offset),
                        match.start(),
                        match.end())
 
+    @classmethod
+    def _is_in_parentheses(cls, text: str) -> bool:
+        return cls._IN_BRACKETS_PATTERN.fullmatch(text) is None
+
+    def _report_unparsable(self, text: str, offset: int | None) -> None:
+        if self._diagnostics is not None:
+            self._diagnostics.unparsable_citation(text, offset)
+        else:
+            warnings.warn(f"Found no ref ID in '{text}'. Please make sure, "
+                          f"the pattern is correct. This match is ignored.")
+
+
+class CitationReplacer(CitationFinder):
+    """
+    Replace Pandoc citations by HTML
+    Following https://pandoc.org/MANUAL.html#citation-syntax
+
+    Currently NOT supported:
+      - Locator
+      - Prefix
+      - Suffix
+      - Suppress author
+    """
+
+    def __init__(self,
+                 bibliography: JSON = (),
+                 style_name: str = 'harvard1',
+                 parse_template: TemplateParser | None = None,
+                 locale: str = None,
+                 reuse_citations: bool = True,
+                 diagnostics: Diagnostics | None = None,
+                 ):
+        """
+        :param bibliography: bibliography in CSL-JSON format
+        :param style_name: style name, cf. https://www.zotero.org/styles/
+        :param parse_template: function to parse template
+        :param locale: localization
+        :param reuse_citations: render repeated citations only once if the
+                                style allows it
+        :param diagnostics: collect problems here instead of warning about
+                            each of them
+        """
+        super().__init__(diagnostics)
+        bib_source = CiteProcJSON(bibliography)
+        bib_style = load_style(style_name, locale, formatter.html)
+        self._bibliography = CitationStylesBibliography(bib_style.style,
+                                                        bib_source,
+                                                        formatter.html)
+        self._rendered = ({} if reuse_citations
+                          and bib_style.reuses_citations
+                          else None)
+
+        # Templates
+        parse_template = parse_template or Jinja2TemplateLoader().get_template
+        self._render_bib = parse_template('bibliography')
+        self._render_citation = parse_template('citation')
+
     def replace(self, match: CitationMatch) -> str:
         """
         Renders citations of the form [@key] and @key to HTML
@@ -107,13 +152,13 @@ class CitationReplacer:
         """
         citation = Citation([CitationItem(ref_id) for ref_id in match.ref_ids])
         self._bibliography.register(citation)
-        ref_text = self._bibliography.cite(citation, self._warn_missing)
-        texts, before, after = (self._parse_mixedstring(ref_text)
-                                if isinstance(ref_text, MixedString)
-                                else self._parse_string(ref_text))
+        ref_ids = tuple(cite.key for cite in citation.cites)
+        if self._rendered is not None and ref_ids in self._rendered:
+            texts, before, after = self._rendered[ref_ids]
+        else:
+            texts, before, after = self._cite(citation, ref_ids, match.offset)
         if not match.is_running_text and not before and not after:
             before, after = "()"
-        ref_ids = [cite.key for cite in citation.cites]
         citation_data = list(zip(ref_ids, texts))
         return self._render_citation(citations=citation_data,
                                      before=before,
@@ -132,9 +177,24 @@ class CitationReplacer:
             for ref_id, ref_body in zip(keys, bibliography)
         ])
 
-    @classmethod
-    def _is_in_parentheses(cls, text: str) -> bool:
-        return cls._IN_BRACKETS_PATTERN.fullmatch(text) is None
+    def _cite(self,
+              citation: Citation,
+              ref_ids: tuple[str, ...],
+              offset: int | None,
+              ) -> tuple[list[MixedString | str], str, str]:
+        ref_text = self._bibliography.cite(
+            citation,
+            lambda citation_item: self._report_missing(citation_item, offset),
+        )
+        parsed = (self._parse_mixedstring(ref_text)
+                  if isinstance(ref_text, MixedString)
+                  else self._parse_string(ref_text))
+        # citations with missing keys are not reused to report each of them
+        if (self._rendered is not None
+                and all(ref_id in self._bibliography.source
+                        for ref_id in ref_ids)):
+            self._rendered[ref_ids] = parsed
+        return parsed
 
     @staticmethod
     def _parse_mixedstring(text: MixedString,
@@ -176,7 +236,47 @@ class CitationReplacer:
         parts = text.split(delimiter)
         return [part.strip() for part in parts], bracket_open, bracket_close
 
-    @staticmethod
-    def _warn_missing(citation_item: CitationItem) -> None:
-        warnings.warn(f"Reference with key '{citation_item.key}' not found in "
-                      f"the bibliography.")
+    def _report_missing(self,
+                        citation_item: CitationItem,
+                        offset: int | None,
+                        ) -> None:
+        if self._diagnostics is not None:
+            self._diagnostics.missing_reference(citation_item.key, offset)
+        else:
+            warnings.warn(f"Reference with key '{citation_item.key}' not "
+                          f"found in the bibliography.")
+
+
+def extract_citation_keys(documents: Iterable[str],
+                          finder: CitationFinder | None = None,
+                          ) -> list[str]:
+    """
+    Collect the keys of all citations in the given Markdown documents without
+    rendering them
+    :param documents: Markdown document contents
+    :param finder: citation finder
+    :return: unique keys in order of first occurrence
+    """
+    return list(locate_citation_keys(documents, finder))
+
+
+def locate_citation_keys(documents: Iterable[str],
+                         finder: CitationFinder | None = None,
+                         ) -> dict[str, list[tuple[int, int | None]]]:
+    """
+    Collect the keys of all citations in the given Markdown documents along
+    with where they are cited, without rendering the documents
+    :param documents: Markdown document contents
+    :param finder: citation finder
+    :return: index of the document and character offset of each occurrence
+             by key, keys in order of first occurrence
+    """
+    finder = finder or CitationFinder()
+    keys = {}
+    for i, document in enumerate(documents):
+        if '@' not in document:
+            continue  # cannot contain any citation, skip parsing
+        for match in find_markdown(document, finder):
+            for ref_id in match.ref_ids:
+                keys.setdefault(ref_id, []).append((i, match.offset))
+    return keys
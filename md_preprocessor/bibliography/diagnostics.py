@@ -0,0 +1,167 @@
+"""Collect problems found while processing citations"""
+import bisect
+import collections
+import dataclasses
+import json
+
+import regex as re
+
+MISSING_REFERENCE = 'missing-reference'
+UNPARSABLE_CITATION = 'unparsable-citation'
+_NEWLINE = re.compile(r'\n')
+_DESCRIPTIONS = {
+    MISSING_REFERENCE: "Reference not found in the bibliography",
+    UNPARSABLE_CITATION: "Found no ref ID in citation, it is ignored",
+}
+
+
+class DiagnosticError(Exception):
+    """Raised on the first problem if diagnostics are collected fail-fast"""
+
+
+@dataclasses.dataclass
+class Location:
+    """Position in a source document, line and column start at 1"""
+
+    document: str | None
+    line: int | None = None
+    column: int | None = None
+
+    def __str__(self):
+        parts = [self.document or '<unknown>']
+        parts.extend(str(part) for part in (self.line, self.column)
+                     if part is not None)
+        return ':'.join(parts)
+
+
+@dataclasses.dataclass
+class Diagnostic:
+    """A problem along with all of its occurrences"""
+
+    kind: str
+    subject: str
+    locations: list[Location]
+
+    @property
+    def count(self) -> int:
+        """Number of occurrences"""
+        return len(self.locations)
+
+    def __str__(self):
+        locations = ', '.join(str(location) for location in self.locations)
+        return (f"{_DESCRIPTIONS[self.kind]}: '{self.subject}' "
+                f"({self.count}x at {locations})")
+
+
+class Diagnostics:
+    """
+    Aggregate problems over one or several documents. Recording a problem
+    only stores its raw offset; line and column are resolved when a summary
+    is requested.
+    """
+
+    def __init__(self, fail_fast: bool = False):
+        """
+        :param fail_fast: raise a DiagnosticError on the first problem
+        """
+        self._fail_fast = fail_fast
+        self._documents = {}
+        self._document = None
+        self._events = collections.defaultdict(list)
+
+    def __bool__(self):
+        return bool(self._events)
+
+    def start_document(self, name: str, text: str) -> None:
+        """
+        Attribute all following problems to the given document
+        :param name: document name, e.g. its path
+        :param text: document content, to resolve line and column
+        """
+        self._document = name
+        self._documents[name] = text
+
+    def missing_reference(self,
+                          key: str,
+                          offset: int | None = None,
+                          document: str | None = None,
+                          ) -> None:
+        """
+        Record a citation of a key that is not in the bibliography
+        :param key: reference key
+        :param offset: character offset of the citation in the document
+        :param document: name of the document, the current one if None
+        """
+        self._record(MISSING_REFERENCE, key, offset, document)
+
+    def unparsable_citation(self,
+                            text: str,
+                            offset: int | None = None,
+                            ) -> None:
+        """
+        Record a citation without ref ID
+        :param text: matched text
+        :param offset: character offset of the citation in the document
+        """
+        self._record(UNPARSABLE_CITATION, text, offset)
+
+    def summary(self) -> list[Diagnostic]:
+        """
+        Aggregate all problems recorded so far
+        :return: one diagnostic per problem, in order of first occurrence
+        """
+        line_starts = {}
+        diagnostics = []
+        for (kind, subject), events in self._events.items():
+            locations = [self._locate(document, offset, line_starts)
+                         for document, offset in events]
+            diagnostics.append(Diagnostic(kind, subject, locations))
+        return diagnostics
+
+    def format_text(self) -> str:
+        """
+        Summarize all problems in human-readable form
+        :return: one line per problem, empty if there were none
+        """
+        return ''.join(f'{diagnostic}\n' for diagnostic in self.summary())
+
+    def format_json(self) -> str:
+        """
+        Summarize all problems in JSON format
+        :return: JSON list of problems
+        """
+        return json.dumps([
+            {'kind': diagnostic.kind,
+             'subject': diagnostic.subject,
+             'count': diagnostic.count,
+             'locations': [dataclasses.asdict(location)
+                           for location in diagnostic.locations]}
+            for diagnostic in self.summary()
+        ], ensure_ascii=False)
+
+    def _record(self,
+                kind: str,
+                subject: str,
+                offset: int | None,
+                document: str | None = None,
+                ) -> None:
+        document = document or self._document
+        self._events[kind, subject].append((document, offset))
+        if self._fail_fast:
+            location = self._locate(document, offset, {})
+            raise DiagnosticError(str(Diagnostic(kind, subject, [location])))
+
+    def _locate(self,
+                document: str | None,
+                offset: int | None,
+                line_starts: dict[str, list[int]],
+                ) -> Location:
+        if offset is None or document not in self._documents:
+            return Location(document)
+        if document not in line_starts:
+            line_starts[document] = [0, *(
+                match.end()
+                for match in _NEWLINE.finditer(self._documents[document]))]
+        starts = line_starts[document]
+        line = bisect.bisect_right(starts, offset)
+        return Location(document, line, offset - starts[line - 1] + 1)
@@ -2,11 +2,18 @@
 """
 Run Pandoc-style citation Markdown preprocessor to parse citations to HTML
 """
-from argparse import ArgumentParser
+from argparse import ArgumentParser, Namespace
 import sys
+from typing import Iterable
 
-from md_preprocessor.bibliography.citations import CitationReplacer
-from md_preprocessor.bibliography.utils import read_csl_bibliography
+from md_preprocessor.bibliography.bibtex import DEFAULT_CACHE_DIR, \
+    read_bibtex_bibliography
+from md_preprocessor.bibliography.citations import CitationFinder, \
+    CitationReplacer, extract_citation_keys, locate_citation_keys
+from md_preprocessor.bibliography.diagnostics import DiagnosticError, \
+    Diagnostics
+from md_preprocessor.bibliography.utils import JSON, \
+    read_csl_bibliography, select_references, write_csl_bibliography
 from md_preprocessor.utils.replace import apply_replace_markdown
 
 
@@ -16,35 +23,137 @@ def get_args(parser: ArgumentParser | None = None):
     :param parser: parser
     """
     parser = parser or ArgumentParser()
-    parser.add_argument('md_file',
-                        help="Path to a Markdown file")
+    parser.add_argument('md_files',
+                        nargs='+',
+                        metavar='md_file',
+                        help="Path to a Markdown file. Multiple files are only"
+                             " accepted with --list-keys or "
+                             "--export-bibliography")
     parser.add_argument('--bibliography',
                         type=str,
                         default=None,
-                        help="Path to CSL-JSON file containing bibliography")
+                        help="Path to CSL-JSON or BibTeX (.bib) file "
+                             "containing bibliography")
+    parser.add_argument('--cache-dir',
+                        type=str,
+                        default=DEFAULT_CACHE_DIR,
+                        help="Directory to cache BibTeX entries converted to "
+                             "CSL in")
+    parser.add_argument('--no-cache',
+                        action='store_true',
+                        help="Do not cache converted BibTeX entries")
     parser.add_argument('--bibliography-marker',
                         type=str,
                         default=r'{{bibliography}}',
                         help="Find this string in the parsed Markdown file and"
                              " replace it by the HTML bibliography")
-    return parser.parse_args()
+    parser.add_argument('--list-keys',
+                        action='store_true',
+                        help="Only print the keys of all citations in the "
+                             "Markdown files, one per line, instead of "
+                             "rendering them")
+    parser.add_argument('--export-bibliography',
+                        type=str,
+                        default=None,
+                        help="Write the entries of --bibliography cited in the"
+                             " Markdown files to this CSL-JSON file")
+    parser.add_argument('--diagnostics',
+                        choices=('text', 'json'),
+                        default='text',
+                        help="Format of the summary of missing references and"
+                             " unparsable citations printed to stderr")
+    parser.add_argument('--fail-fast',
+                        action='store_true',
+                        help="Abort with exit status 1 on the first missing "
+                             "reference or unparsable citation")
+    args = parser.parse_args()
+    if args.export_bibliography and not args.bibliography:
+        parser.error("--export-bibliography requires --bibliography")
+    if (len(args.md_files) > 1 and not args.list_keys
+            and not args.export_bibliography):
+        parser.error("rendering accepts only a single md_file")
+    return args
 
 
 def main_cli():
     """Main entry point for the CLI program"""
     args = get_args()
-    with open(args.md_file, 'r', encoding='utf-8') as fh:
-        contents = fh.read()
-    bibliography = read_csl_bibliography(args.bibliography)
-    replacer = CitationReplacer(bibliography=bibliography)
-    output = apply_replace_markdown(contents, replacer)
-    output = output.replace(args.bibliography_marker,
-                            replacer.render_bibliography())
+    diagnostics = Diagnostics(fail_fast=args.fail_fast)
+    try:
+        if args.list_keys or args.export_bibliography:
+            output = _extract_keys(args, diagnostics)
+        else:
+            output = _render(args, diagnostics)
+    except DiagnosticError as e:
+        sys.exit(f"error: {e}")
+    if args.diagnostics == 'json':
+        sys.stderr.write(f'{diagnostics.format_json()}\n')
+    else:
+        sys.stderr.write(diagnostics.format_text())
     try:
         sys.stdout.write(output)
     except BrokenPipeError:
         pass
 
 
+def _extract_keys(args: Namespace, diagnostics: Diagnostics) -> str:
+    documents = _read_documents(args.md_files, diagnostics)
+    locations = locate_citation_keys(documents, CitationFinder(diagnostics))
+    keys = list(locations)
+    if args.bibliography:
+        bibliography = select_references(_read_bibliography(args, keys),
+                                         keys)
+        found = {str(entry['id']).lower() for entry in bibliography}
+        for key in keys:
+            if key.lower() in found:
+                continue
+            for i, offset in locations[key]:
+                diagnostics.missing_reference(key, offset, args.md_files[i])
+        if args.export_bibliography:
+            write_csl_bibliography(bibliography, args.export_bibliography)
+    if not args.list_keys:
+        return ''
+    return ''.join(f'{key}\n' for key in keys)
+
+
+def _render(args: Namespace, diagnostics: Diagnostics) -> str:
+    contents, = _read_documents(args.md_files[:1], diagnostics)
+    keys = (extract_citation_keys([contents])
+            if _is_bibtex(args.bibliography)
+            else None)
+    bibliography = _read_bibliography(args, keys)
+    replacer = CitationReplacer(bibliography=bibliography,
+                                diagnostics=diagnostics)
+    output = apply_replace_markdown(contents, replacer)
+    return output.replace(args.bibliography_marker,
+                          replacer.render_bibliography())
+
+
+def _is_bibtex(path: str | None) -> bool:
+    return path is not None and path.lower().endswith('.bib')
+
+
+def _read_bibliography(args: Namespace, keys: list[str] | None) -> JSON:
+    if args.bibliography is None:
+        return []
+    if not _is_bibtex(args.bibliography):
+        return read_csl_bibliography(args.bibliography)
+    return read_bibtex_bibliography(
+        args.bibliography,
+        keys=keys,
+        cache_dir=None if args.no_cache else args.cache_dir,
+    )
+
+
+def _read_documents(paths: list[str],
+                    diagnostics: Diagnostics,
+                    ) -> Iterable[str]:
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as fh:
+            contents = fh.read()
+        diagnostics.start_document(path, contents)
+        yield contents
+
+
 if __name__ == '__main__':
     main_cli()
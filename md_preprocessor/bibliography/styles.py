@@ -0,0 +1,57 @@
+"""Parsed CSL styles shared between citation replacers"""
+import dataclasses
+import functools
+import threading
+from types import ModuleType
+
+from citeproc import CitationStylesStyle, formatter
+
+_CSL_NAMESPACES = {'cs': 'http://purl.org/net/xbiblio/csl'}
+# Constructs whose output depends on previous citations
+_HISTORY_DEPENDENT = ('//cs:*[@position]'
+                      ' | //cs:*[@variable="citation-number"]')
+
+
+@dataclasses.dataclass(frozen=True)
+class ParsedStyle:
+    """A parsed CSL style and whether its rendered citations can be reused"""
+
+    style: CitationStylesStyle
+    reuses_citations: bool
+
+
+def load_style(style_name: str,
+               locale: str | None = None,
+               output_format: ModuleType = formatter.html,
+               ) -> ParsedStyle:
+    """
+    Parse a CSL style once per style, locale, output format and thread.
+    Citations are still interpreted by citeproc; the style only tells whether
+    a citation renders the same regardless of the citations preceding it, so
+    that its output can be reused for repeated citations.
+
+    The returned style is shared by all callers in the same thread with the
+    same arguments. citeproc keeps state of the current rendering on the
+    style, which is why styles are not shared between threads, and
+    CitationStylesBibliography sets the style's formatter, which is why the
+    style must only be used with output_format.
+    :param style_name: style name, cf. https://www.zotero.org/styles/
+    :param locale: localization
+    :param output_format: citeproc formatter the style is used with
+    :return: parsed style
+    """
+    return _load_style(style_name, locale, output_format,
+                       threading.get_ident())
+
+
+@functools.lru_cache(maxsize=None)
+def _load_style(style_name: str,
+                locale: str | None,
+                output_format: ModuleType,
+                thread_id: int,  # pylint: disable=unused-argument
+                ) -> ParsedStyle:
+    style = CitationStylesStyle(style_name, validate=False, locale=locale)
+    style.root.formatter = output_format
+    history_dependent = style.xml.xpath(_HISTORY_DEPENDENT,
+                                       namespaces=_CSL_NAMESPACES)
+    return ParsedStyle(style, not history_dependent)
@@ -2,7 +2,7 @@
 import collections
 import json
 import os
-from typing import Any, Callable
+from typing import Any, Callable, Iterable
 
 import jinja2
 
@@ -47,6 +47,29 @@ def read_csl_bibliography(path: str) -> JSON:
         return json.load(fh)
 
 
+def write_csl_bibliography(bibliography: JSON, path: str) -> None:
+    """
+    Write CSL-style bibliography to file
+    :param bibliography: bibliography in JSON format
+    :param path: path to bibliography file
+    """
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(bibliography, fh, ensure_ascii=False)
+
+
+def select_references(bibliography: JSON, keys: Iterable[str]) -> JSON:
+    """
+    Reduce a CSL-style bibliography to the entries with the given keys. Keys
+    are compared case-insensitively, like citeproc does.
+    :param bibliography: bibliography in JSON format
+    :param keys: keys of the entries to keep
+    :return: bibliography containing only the selected entries
+    """
+    keys = {key.lower() for key in keys}
+    return [entry for entry in bibliography
+            if str(entry.get('id', '')).lower() in keys]
+
+
 def sanitize_path(path: str) -> str:
     """
     Sanitize file paths to make sure they are within the current directory
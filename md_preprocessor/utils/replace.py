@@ -1,5 +1,5 @@
 """Find-and-replace utility"""
-from typing import Iterable, Protocol, TypeVar
+from typing import Any, Iterable, Protocol, TypeVar, runtime_checkable
 
 import marko
 from marko.md_renderer import MarkdownRenderer
@@ -10,8 +10,8 @@ _Match = TypeVar("_Match")
 _NO_REPLACE = frozenset(('Link', 'CodeSpan', 'CodeBlock', 'FencedCode'))
 
 
-class _Replacer(Protocol):
-    """Find and replace action"""
+class _Finder(Protocol):
+    """Find action"""
 
     def find(self, text: str) -> Iterable[tuple[_Match, int, int]]:
         """
@@ -20,6 +20,21 @@ class _Replacer(Protocol):
         :return: matches
         """
 
+
+@runtime_checkable
+class _OffsetAware(Protocol):
+    """Finder that reports positions relative to the whole document"""
+
+    def set_offset(self, offset: int | None) -> None:
+        """
+        Set the position of the text passed to the next find call
+        :param offset: character offset in the document, None if unknown
+        """
+
+
+class _Replacer(_Finder, Protocol):
+    """Find and replace action"""
+
     def replace(self, match: _Match) -> str:
         """
         Replace matches by some other string
@@ -63,14 +78,91 @@ def apply_replace_markdown(markdown: str,
     :return: Markdown document after the replacement
     """
     markdown_tree = marko.parse(markdown)
+    for node in _iter_raw_text(markdown_tree, avoid, markdown, replacer):
+        node.children = apply_replace(node.children, replacer)
+    with MarkdownRenderer() as renderer:
+        return renderer.render(markdown_tree)
+
+
+def find_markdown(markdown: str,
+                  finder: _Finder,
+                  avoid: Iterable[str] = _NO_REPLACE,
+                  ) -> Iterable[_Match]:
+    """
+    Find patterns in Markdown text without rendering the document again,
+    ignoring the same elements as apply_replace_markdown
+    :param markdown: Markdown document content
+    :param finder: find rules
+    :param avoid: do not search within these Markdown elements
+    :return: iterable over matches
+    """
+    markdown_tree = marko.parse(markdown)
+    for node in _iter_raw_text(markdown_tree, avoid, markdown, finder):
+        for match, _, _ in finder.find(node.children):
+            yield match
+
+
+def _iter_raw_text(markdown_tree: Any,
+                   avoid: Iterable[str],
+                   markdown: str,
+                   finder: _Finder,
+                   ) -> Iterable[Any]:
+    avoid = frozenset(avoid)
+    offsets = (_locate_raw_text(markdown_tree, avoid, markdown)
+               if isinstance(finder, _OffsetAware)
+               else None)
     tree_it = TreeIterator(markdown_tree)
     for node in tree_it:
         if not hasattr(node, "get_type"):
             continue
         if node.get_type() == 'RawText':  # raw text
-            node.children = apply_replace(node.children, replacer)
+            if offsets is not None:
+                finder.set_offset(offsets.get(id(node)))
+            yield node
             tree_it.prune()
-        elif any(node.get_type() == cls_name for cls_name in avoid):
+        elif node.get_type() in avoid:
             tree_it.prune()  # don't want to replace its contents
-    with MarkdownRenderer() as renderer:
-        return renderer.render(markdown_tree)
+
+
+def _locate_raw_text(markdown_tree: Any,
+                     avoid: frozenset[str],
+                     markdown: str,
+                     ) -> dict[int, int]:
+    # text appears in the source in document order, so search each fragment
+    # after the previous one. Text of avoided elements is only skipped over,
+    # so that the same text in e.g. a code block isn't mistaken for a later
+    # fragment
+    offsets = {}
+    cursor = 0
+    stack = [(markdown_tree, True)]
+    while stack:
+        node, record = stack.pop()
+        if isinstance(node, str):  # source text outside of children
+            offset = markdown.find(node, cursor)
+            cursor = offset + len(node) if offset >= 0 else cursor
+            continue
+        if not hasattr(node, "get_type"):
+            continue
+        children = getattr(node, "children", None)
+        if isinstance(children, str):
+            offset = markdown.find(children, cursor)
+            if offset >= 0:
+                if record and node.get_type() == 'RawText':
+                    offsets[id(node)] = offset
+                cursor = offset + len(children)
+            else:  # e.g. indentation of code blocks was removed
+                cursor = _skip_lines(markdown, children, cursor)
+        elif isinstance(children, list):
+            record = record and node.get_type() not in avoid
+            if getattr(node, "dest", None):  # link destination follows
+                stack.append((node.dest, False))
+            stack.extend((child, record) for child in reversed(children))
+    return offsets
+
+
+def _skip_lines(markdown: str, text: str, cursor: int) -> int:
+    for line in text.splitlines():
+        offset = markdown.find(line, cursor) if line else -1
+        if offset >= 0:
+            cursor = offset + len(line)
+    return cursor
@@ -0,0 +1,192 @@
+import io
+import os.path
+import tempfile
+import unittest
+from unittest import mock
+
+from md_preprocessor.bibliography.bibtex import _BibTeXCache, iter_bibtex_entries, \
+    read_bibtex_bibliography
+from tests.utils import BIBTEX_PATH
+
+
+class TestIterBibTeXEntries(unittest.TestCase):
+    """Test the iter_bibtex_entries function"""
+
+    def test_iter_bibtex_entries(self):
+        with open(BIBTEX_PATH, 'r', encoding='utf-8') as fh:
+            entries = [(entry.entry_type, entry.key) for entry in iter_bibtex_entries(fh)]
+        expected = [
+            ('string', ''),
+            ('comment', ''),
+            ('article', 'zeilerADADELTAAdaptiveLearning2012'),
+            ('inproceedings', 'bengioAdvancesOptimizingRecurrent2012'),
+            ('book', 'vanBeethovenSymphonies1808'),
+        ]
+        self.assertEqual(expected, entries)
+
+    def test_iter_bibtex_entries__small_chunks(self):
+        with open(BIBTEX_PATH, 'r', encoding='utf-8') as fh:
+            expected = list(iter_bibtex_entries(fh))
+        with open(BIBTEX_PATH, 'r', encoding='utf-8') as fh:
+            output = list(iter_bibtex_entries(fh, chunk_size=7))
+        self.assertEqual(expected, output)
+
+    def test_iter_bibtex_entries__paren_in_quotes(self):
+        fh = io.StringIO('@article(p, title = "Paren ) inside", year = 2001)\n'
+                         '@misc(q, title = {Brace ) inside})')
+        entries = list(iter_bibtex_entries(fh))
+        self.assertEqual(['p', 'q'], [entry.key for entry in entries])
+        self.assertEqual({'title': 'Paren ) inside', 'year': '2001'}, entries[0].fields())
+        self.assertEqual({'title': 'Brace ) inside'}, entries[1].fields())
+
+    def test_iter_bibtex_entries__unterminated(self):
+        fh = io.StringIO("@misc{a, title={A}}\n@misc{b, title={B}")
+        with self.assertWarns(UserWarning):
+            keys = [entry.key for entry in iter_bibtex_entries(fh)]
+        self.assertEqual(['a'], keys)
+
+
+class TestReadBibTeXBibliography(unittest.TestCase):
+    """Test the read_bibtex_bibliography function"""
+
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = self._tmp_dir.name
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_read_bibtex_bibliography__article(self):
+        entry, = read_bibtex_bibliography(BIBTEX_PATH, keys=['zeileradadeltaadaptivelearning2012'],
+                                          cache_dir=None)
+        expected = {
+            'id': 'zeilerADADELTAAdaptiveLearning2012',
+            'type': 'article-journal',
+            'title': 'ADADELTA: An Adaptive Learning Rate Method',
+            'author': [{'family': 'Zeiler', 'given': 'Matthew D.'}],
+            'container-title': 'Journal of Machine Learning Research',
+            'issued': {'date-parts': [[2012, 12]]},
+            'volume': '13',
+            'page': '1-20',
+        }
+        self.assertEqual(expected, entry)
+
+    def test_read_bibtex_bibliography__inproceedings(self):
+        entry, = read_bibtex_bibliography(BIBTEX_PATH, keys=['bengioAdvancesOptimizingRecurrent2012'],
+                                          cache_dir=None)
+        self.assertEqual('paper-conference', entry['type'])
+        self.assertEqual('Proceedings of the IEEE Conference on Acoustics, Speech and Signal Processing',
+                         entry['container-title'])
+        self.assertEqual({'date-parts': [[2012, 5, 1]]}, entry['issued'])
+        self.assertEqual(['Bengio', 'Boulanger-Lewandowski', 'Pascanu'],
+                         [name['family'] for name in entry['author']])
+
+    def test_read_bibtex_bibliography__names_and_escapes(self):
+        entry, = read_bibtex_bibliography(BIBTEX_PATH, keys=['vanBeethovenSymphonies1808'],
+                                          cache_dir=None)
+        self.assertEqual('Symphonies & Sonatas', entry['title'])
+        self.assertEqual('Edition 2, revised', entry['note'])
+        self.assertEqual([{'family': 'Beethoven', 'given': 'Ludwig', 'non-dropping-particle': 'van'},
+                          {'literal': 'Wiener Philharmoniker'}],
+                         entry['author'])
+        self.assertEqual([{'family': 'Müller', 'given': 'Hans'},
+                          {'family': 'García', 'given': 'José'}],
+                         entry['editor'])
+
+    def test_read_bibtex_bibliography__no_keys(self):
+        with mock.patch('md_preprocessor.bibliography.bibtex._convert_bibtex') as convert_bibtex:
+            output = read_bibtex_bibliography(BIBTEX_PATH, keys=[], cache_dir=self.cache_dir)
+        self.assertEqual([], output)
+        convert_bibtex.assert_not_called()
+        self.assertEqual([], os.listdir(self.cache_dir))
+
+    def test_read_bibtex_bibliography__all(self):
+        output = read_bibtex_bibliography(BIBTEX_PATH, cache_dir=None)
+        self.assertEqual(['zeilerADADELTAAdaptiveLearning2012',
+                          'bengioAdvancesOptimizingRecurrent2012',
+                          'vanBeethovenSymphonies1808'],
+                         [entry['id'] for entry in output])
+
+    def test_read_bibtex_bibliography__verbatim_url_doi(self):
+        path = self._write_bibtex(r"@misc{a, url = {{http://example.com/~user/a\_b\%20c}}, "
+                                  r"doi = {10.1000/x~y}, title = {A~B}}")
+        entry, = read_bibtex_bibliography(path, cache_dir=None)
+        self.assertEqual('http://example.com/~user/a_b%20c', entry['URL'])
+        self.assertEqual('10.1000/x~y', entry['DOI'])
+        self.assertEqual('A\u00a0B', entry['title'])
+
+    def test_read_bibtex_bibliography__duplicate_key(self):
+        path = self._write_bibtex("@misc{dup, title = {First}}\n"
+                                  "@misc{DUP, title = {Second}}")
+        with self.assertWarnsRegex(UserWarning, "Duplicate BibTeX key 'DUP'"):
+            entry, = read_bibtex_bibliography(path, keys=['dup'], cache_dir=None)
+        self.assertEqual('First', entry['title'])
+
+    def test_read_bibtex_bibliography__missing_comma(self):
+        path = self._write_bibtex("@misc{a, title = {A} year = 2000}\n"
+                                  "@misc{b, title = {B}}")
+        with self.assertWarnsRegex(UserWarning, "Malformed BibTeX @misc entry 'a'"):
+            output = read_bibtex_bibliography(path, cache_dir=None)
+        self.assertEqual(['b'], [entry['id'] for entry in output])
+
+    def test_read_bibtex_bibliography__unterminated_quote(self):
+        path = self._write_bibtex('@string{bad = "A}\n'
+                                  '@misc{a, title = "A}\n'
+                                  '@misc{b, title = {B}}')
+        with self.assertWarnsRegex(UserWarning, "Malformed BibTeX @string entry") as context:
+            output = read_bibtex_bibliography(path, cache_dir=None)
+        self.assertEqual(['b'], [entry['id'] for entry in output])
+        self.assertTrue(any(str(warning.message).startswith("Malformed BibTeX @misc entry 'a'")
+                            for warning in context.warnings))
+
+    def test_read_bibtex_bibliography__cache(self):
+        keys = ['zeilerADADELTAAdaptiveLearning2012', 'xyz']
+        expected = read_bibtex_bibliography(BIBTEX_PATH, keys=keys, cache_dir=None)
+        output = read_bibtex_bibliography(BIBTEX_PATH, keys=keys, cache_dir=self.cache_dir)
+        self.assertEqual(expected, output)
+        self.assertEqual(1, len(os.listdir(self.cache_dir)))
+
+        cached = read_bibtex_bibliography(BIBTEX_PATH, keys=keys, cache_dir=self.cache_dir)
+        self.assertEqual(expected, cached)
+
+        output = read_bibtex_bibliography(BIBTEX_PATH, cache_dir=self.cache_dir)
+        self.assertEqual(3, len(output))
+
+    def test_read_bibtex_bibliography__cache_touched(self):
+        path = self._write_bibtex("@misc{a, title={A}}")
+        cache_dir = os.path.join(self.cache_dir, 'cache')
+        read_bibtex_bibliography(path, keys=['a'], cache_dir=cache_dir)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        file_digest = _BibTeXCache._file_digest
+        calls = []
+
+        def count_file_digest(cache):
+            calls.append(cache)
+            return file_digest(cache)
+
+        with mock.patch.object(_BibTeXCache, '_file_digest', count_file_digest):
+            output = read_bibtex_bibliography(path, keys=['a'], cache_dir=cache_dir)
+            self.assertEqual(1, len(calls))
+            read_bibtex_bibliography(path, keys=['a'], cache_dir=cache_dir)
+            self.assertEqual(1, len(calls))
+        self.assertEqual('A', output[0]['title'])
+
+    def test_read_bibtex_bibliography__cache_invalidated(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.bib', dir=self.cache_dir, delete=False) as fh:
+            fh.write("@misc{a, title={Old}}")
+        cache_dir = os.path.join(self.cache_dir, 'cache')
+        output = read_bibtex_bibliography(fh.name, keys=['a'], cache_dir=cache_dir)
+        self.assertEqual('Old', output[0]['title'])
+
+        with open(fh.name, 'w', encoding='utf-8') as new_fh:
+            new_fh.write("@misc{a, title={New title}}")
+        output = read_bibtex_bibliography(fh.name, keys=['a'], cache_dir=cache_dir)
+        self.assertEqual('New title', output[0]['title'])
+
+    def _write_bibtex(self, contents: str) -> str:
+        path = os.path.join(self.cache_dir, 'malformed.bib')
+        with open(path, 'w', encoding='utf-8') as fh:
+            fh.write(contents)
+        return path
@@ -1,23 +1,13 @@
 import itertools
-import json
 from operator import itemgetter
-import os.path
-from typing import Any, Iterable
+from typing import Iterable
 import unittest
 import xml.etree.ElementTree as ET
 
-from md_preprocessor.bibliography.citations import CitationMatch, CitationReplacer
-from md_preprocessor.bibliography.utils import Jinja2TemplateLoader
-
-_ROOT_PATH = os.path.abspath(os.path.dirname(__file__))
-_FIXTURES_PATH = os.path.join(_ROOT_PATH, 'fixtures')
-_BIBLIOGRAPHY_PATH = os.path.join(_FIXTURES_PATH, 'bibliography.json')
-_TEMPLATES_PATH = os.path.join(_FIXTURES_PATH, 'templates')
-
-
-def load_bibliography(path: str = _BIBLIOGRAPHY_PATH) -> dict[str, Any]:
-    with open(path, 'r') as fh:
-        return json.load(fh)
+from md_preprocessor.bibliography.citations import CitationMatch, CitationReplacer, \
+    extract_citation_keys
+from md_preprocessor.bibliography.utils import Jinja2TemplateLoader, select_references
+from tests.utils import TEMPLATES_PATH, load_bibliography
 
 
 class TestCitationReplacer(unittest.TestCase):
@@ -25,7 +15,7 @@ class TestCitationReplacer(unittest.TestCase):
 
     def setUp(self):
         bibliography = load_bibliography()
-        template_loader = Jinja2TemplateLoader(_TEMPLATES_PATH)
+        template_loader = Jinja2TemplateLoader(TEMPLATES_PATH)
         self.replacer = CitationReplacer(bibliography,
                                          style_name='harvard1',
                                          template_loader=template_loader)
@@ -241,3 +231,30 @@ class TestCitationReplacer(unittest.TestCase):
     def _get_matches(self, text: str, n: int | None = None) -> list[CitationMatch]:
         matches = self.replacer.find(text)
         return list(itertools.islice(map(itemgetter(0), matches), n))
+
+
+class TestExtractCitationKeys(unittest.TestCase):
+    """Test the extract_citation_keys function"""
+
+    def test_extract_citation_keys__empty(self):
+        self.assertEqual([], extract_citation_keys([]))
+        self.assertEqual([], extract_citation_keys(["No citations here."]))
+
+    def test_extract_citation_keys__unique_in_order(self):
+        documents = [
+            "Lorem [@doe99; @smith2000] ipsum @doe99.",
+            "Dolor `@code` sit [@smith2004] amet [link @smith2010](https://example.com).",
+        ]
+        expected = ["doe99", "smith2000", "smith2004"]
+        self.assertEqual(expected, extract_citation_keys(documents))
+
+
+class TestSelectReferences(unittest.TestCase):
+    """Test the select_references function"""
+
+    def test_select_references(self):
+        bibliography = load_bibliography()
+        keys = ["kingmaAdamMethodStochastic2017", "ningqianmomentumtermgradient1999", "xyz"]
+        output = select_references(bibliography, keys)
+        self.assertEqual(["kingmaAdamMethodStochastic2017", "ningqianMomentumTermGradient1999"],
+                         sorted(entry["id"] for entry in output))
@@ -0,0 +1,154 @@
+import json
+import os.path
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from md_preprocessor.bibliography.citations import CitationReplacer, locate_citation_keys
+from md_preprocessor.bibliography.diagnostics import DiagnosticError, Diagnostics, Location, \
+    MISSING_REFERENCE, UNPARSABLE_CITATION
+from md_preprocessor.utils.replace import apply_replace_markdown
+from tests.utils import BIBTEX_PATH, BUNDLED_STYLES, load_bibliography
+
+_STYLE_NAME = BUNDLED_STYLES[0]
+_DOCUMENT = (
+    "# Title\n"
+    "\n"
+    "Lorem [@kingmaAdamMethodStochastic2017] ipsum @xyz.\n"
+    "`@abc` dolor\n"
+    "\n"
+    "- sit *amet @xyz* [@abc]\n"
+)
+
+
+class TestDiagnostics(unittest.TestCase):
+    """Test the Diagnostics class"""
+
+    def test_diagnostics__empty(self):
+        diagnostics = Diagnostics()
+        self.assertFalse(diagnostics)
+        self.assertEqual("", diagnostics.format_text())
+        self.assertEqual([], json.loads(diagnostics.format_json()))
+
+    def test_diagnostics__aggregate(self):
+        diagnostics = Diagnostics()
+        diagnostics.start_document("a.md", "abc\ndef\n")
+        diagnostics.missing_reference("xyz", 0)
+        diagnostics.unparsable_citation("[@]", 5)
+        diagnostics.start_document("b.md", "\n\nxyz")
+        diagnostics.missing_reference("xyz", 3)
+        diagnostics.missing_reference("xyz")
+
+        summary = diagnostics.summary()
+        self.assertEqual([(MISSING_REFERENCE, "xyz", 3), (UNPARSABLE_CITATION, "[@]", 1)],
+                         [(diagnostic.kind, diagnostic.subject, diagnostic.count) for diagnostic in summary])
+        self.assertEqual([Location("a.md", 1, 1), Location("b.md", 3, 2), Location("b.md")],
+                         summary[0].locations)
+        self.assertEqual([Location("a.md", 2, 2)], summary[1].locations)
+
+    def test_diagnostics__format(self):
+        diagnostics = Diagnostics()
+        diagnostics.start_document("a.md", "abc\ndef\n")
+        diagnostics.missing_reference("xyz", 4)
+        diagnostics.missing_reference("xyz", 6)
+        self.assertEqual("Reference not found in the bibliography: 'xyz' (2x at a.md:2:1, a.md:2:3)\n",
+                         diagnostics.format_text())
+        expected = [{
+            "kind": MISSING_REFERENCE,
+            "subject": "xyz",
+            "count": 2,
+            "locations": [{"document": "a.md", "line": 2, "column": 1},
+                          {"document": "a.md", "line": 2, "column": 3}],
+        }]
+        self.assertEqual(expected, json.loads(diagnostics.format_json()))
+
+    def test_diagnostics__fail_fast(self):
+        diagnostics = Diagnostics(fail_fast=True)
+        diagnostics.start_document("a.md", "abc\ndef\n")
+        with self.assertRaisesRegex(DiagnosticError, "'xyz'.*a.md:2:1"):
+            diagnostics.missing_reference("xyz", 4)
+
+
+class TestCitationReplacerDiagnostics(unittest.TestCase):
+    """Test collecting diagnostics while replacing citations"""
+
+    def test_replace_markdown__locations(self):
+        diagnostics = Diagnostics()
+        diagnostics.start_document("document.md", _DOCUMENT)
+        replacer = CitationReplacer(load_bibliography(), style_name=_STYLE_NAME, diagnostics=diagnostics)
+        apply_replace_markdown(_DOCUMENT, replacer)
+
+        summary = {diagnostic.subject: diagnostic.locations for diagnostic in diagnostics.summary()}
+        self.assertEqual({
+            "xyz": [Location("document.md", 3, 47), Location("document.md", 6, 13)],
+            "abc": [Location("document.md", 6, 19)],
+        }, summary)
+
+    def test_replace_markdown__fail_fast(self):
+        diagnostics = Diagnostics(fail_fast=True)
+        diagnostics.start_document("document.md", _DOCUMENT)
+        replacer = CitationReplacer(load_bibliography(), style_name=_STYLE_NAME, diagnostics=diagnostics)
+        with self.assertRaisesRegex(DiagnosticError, "document.md:3:47"):
+            apply_replace_markdown(_DOCUMENT, replacer)
+
+
+class TestLocateCitationKeys(unittest.TestCase):
+    """Test resolving the location of citations when the same text appears earlier"""
+
+    def test_locate_citation_keys__after_code_block(self):
+        self._check_location("```\nsee @abc\n```\n\nsee @abc\n", Location("a.md", 5, 5))
+
+    def test_locate_citation_keys__after_indented_code_block(self):
+        self._check_location("    see @abc\n    end\n\nsee @abc\n", Location("a.md", 4, 5))
+
+    def test_locate_citation_keys__after_code_span(self):
+        self._check_location("`x @abc` x @abc\n", Location("a.md", 1, 12))
+
+    def test_locate_citation_keys__after_link_text(self):
+        self._check_location("[x @abc](u)\n\nx @abc\n", Location("a.md", 3, 3))
+
+    def test_locate_citation_keys__after_link_destination(self):
+        self._check_location("[x](http://example.com/@abc) x @abc\n", Location("a.md", 1, 32))
+
+    def _check_location(self, text: str, expected: Location) -> None:
+        diagnostics = Diagnostics()
+        diagnostics.start_document("a.md", text)
+        for key, occurrences in locate_citation_keys([text]).items():
+            for _, offset in occurrences:
+                diagnostics.missing_reference(key, offset)
+        diagnostic, = diagnostics.summary()
+        self.assertEqual([expected], diagnostic.locations)
+
+
+class TestExtractKeysDiagnostics(unittest.TestCase):
+    """Test reporting missing references when only extracting keys"""
+
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.md_path = os.path.join(self._tmp_dir.name, 'a.md')
+        with open(self.md_path, 'w', encoding='utf-8') as fh:
+            fh.write("Lorem [@zeilerADADELTAAdaptiveLearning2012]\n\nipsum @xyz.\n")
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_list_keys__missing_reference(self):
+        export_path = os.path.join(self._tmp_dir.name, 'cited.json')
+        result = self._run('--export-bibliography', export_path)
+        self.assertEqual(0, result.returncode)
+        self.assertEqual("zeilerADADELTAAdaptiveLearning2012\nxyz\n", result.stdout)
+        self.assertIn(f"'xyz' (1x at {self.md_path}:3:7)", result.stderr)
+        with open(export_path, 'r', encoding='utf-8') as fh:
+            self.assertEqual(["zeilerADADELTAAdaptiveLearning2012"], [entry["id"] for entry in json.load(fh)])
+
+    def test_list_keys__fail_fast(self):
+        result = self._run('--fail-fast')
+        self.assertEqual(1, result.returncode)
+        self.assertIn(f"'xyz' (1x at {self.md_path}:3:7)", result.stderr)
+
+    def _run(self, *args: str) -> subprocess.CompletedProcess:
+        return subprocess.run([sys.executable, '-m', 'md_preprocessor.bibliography.main',
+                               '--list-keys', '--no-cache', '--bibliography', BIBTEX_PATH,
+                               *args, self.md_path],
+                              capture_output=True, text=True)
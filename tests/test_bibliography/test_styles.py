@@ -0,0 +1,93 @@
+import os.path
+import threading
+import unittest
+from unittest import mock
+
+from citeproc import formatter
+
+from md_preprocessor.bibliography.citations import CitationMatch, CitationReplacer
+from md_preprocessor.bibliography.styles import load_style
+from md_preprocessor.bibliography.utils import Jinja2TemplateLoader
+from tests.utils import BIBLIOGRAPHY_FIXTURES_PATH, BUNDLED_STYLES, TEMPLATES_PATH, \
+    load_bibliography
+
+_POSITION_STYLE_PATH = os.path.join(BIBLIOGRAPHY_FIXTURES_PATH, 'styles', 'position.csl')
+_CITATIONS = (
+    ['kingmaAdamMethodStochastic2017'],
+    ['bengioAdvancesOptimizingRecurrent2012', 'ningqianMomentumTermGradient1999'],
+    ['kingmaAdamMethodStochastic2017'],
+    ['xyz'],
+    ['ningqianMomentumTermGradient1999', 'bengioAdvancesOptimizingRecurrent2012'],
+    ['bengioAdvancesOptimizingRecurrent2012', 'ningqianMomentumTermGradient1999'],
+    ['xyz'],
+    ['KINGMAADAMMETHODSTOCHASTIC2017'],
+)
+
+
+class TestLoadStyle(unittest.TestCase):
+    """Test the load_style function"""
+
+    def test_load_style__cached(self):
+        self.assertIs(load_style(_POSITION_STYLE_PATH), load_style(_POSITION_STYLE_PATH))
+
+    def test_load_style__per_thread(self):
+        styles = []
+        thread = threading.Thread(target=lambda: styles.append(load_style(_POSITION_STYLE_PATH)))
+        thread.start()
+        thread.join()
+        self.assertIsNot(load_style(_POSITION_STYLE_PATH), styles[0])
+
+    def test_load_style__per_output_format(self):
+        html_style = load_style(_POSITION_STYLE_PATH, None, formatter.html)
+        plain_style = load_style(_POSITION_STYLE_PATH, None, formatter.plain)
+        self.assertIsNot(html_style, plain_style)
+        self.assertIs(formatter.html, html_style.style.root.formatter)
+        self.assertIs(formatter.plain, plain_style.style.root.formatter)
+
+    def test_load_style__position_dependent(self):
+        self.assertFalse(load_style(_POSITION_STYLE_PATH).reuses_citations)
+
+    def test_load_style__bundled(self):
+        for style_name in BUNDLED_STYLES:
+            with self.subTest(style_name=style_name):
+                self.assertTrue(load_style(style_name).reuses_citations)
+
+
+class TestReuseCitations(unittest.TestCase):
+    """Reusing rendered citations must not change the output"""
+
+    def test_reuse_citations__bundled_styles(self):
+        for style_name in BUNDLED_STYLES:
+            with self.subTest(style_name=style_name):
+                self._check_same_output(style_name)
+
+    def test_reuse_citations__position_style(self):
+        expected, output = self._check_same_output(_POSITION_STYLE_PATH)
+        self.assertIn('ibid', output[2])
+
+    def test_reuse_citations__render_once(self):
+        for style_name, expected_calls in ((BUNDLED_STYLES[0], 5), (_POSITION_STYLE_PATH, len(_CITATIONS))):
+            with self.subTest(style_name=style_name):
+                replacer = CitationReplacer(load_bibliography(), style_name=style_name)
+                with mock.patch.object(replacer._bibliography, 'cite',
+                                       wraps=replacer._bibliography.cite) as cite:
+                    for ref_ids in _CITATIONS:
+                        replacer.replace(CitationMatch(ref_ids=ref_ids, is_running_text=False))
+                self.assertEqual(expected_calls, cite.call_count)
+
+    def _check_same_output(self, style_name: str) -> tuple[list[str], list[str]]:
+        expected = self._render(style_name, reuse_citations=False)
+        output = self._render(style_name, reuse_citations=True)
+        self.assertEqual(expected, output)
+        return expected, output
+
+    @staticmethod
+    def _render(style_name: str, reuse_citations: bool) -> list[str]:
+        replacer = CitationReplacer(load_bibliography(),
+                                    style_name=style_name,
+                                    parse_template=Jinja2TemplateLoader(TEMPLATES_PATH).get_template,
+                                    reuse_citations=reuse_citations)
+        output = [replacer.replace(CitationMatch(ref_ids=ref_ids, is_running_text=False))
+                  for ref_ids in _CITATIONS]
+        output.append(replacer.render_bibliography())
+        return output
@@ -1,7 +1,8 @@
 import os.path
 import unittest
 
-from md_preprocessor.utils.replace import apply_replace, apply_replace_markdown
+from md_preprocessor.utils.replace import apply_replace, apply_replace_markdown, \
+    find_markdown
 from tests.utils import MapReplacer
 
 _ROOT_PATH = os.path.abspath(os.path.dirname(__file__))
@@ -69,3 +70,23 @@ class TestApplyReplaceMarkdown(unittest.TestCase):
         text, expected = load_example("citation_document1")
         result = apply_replace_markdown(text, self.replacer)
         self.assertEqual(expected, result)
+
+
+class TestFindMarkdown(unittest.TestCase):
+    """Test the find_markdown function"""
+
+    def setUp(self):
+        self.replacer = MapReplacer({
+            '@kingmaAdamMethodStochastic2017': 'Kingma, 2017',
+        })
+
+    def test_find_markdown__empty(self):
+        result = list(find_markdown("", self.replacer))
+        self.assertEqual([], result)
+
+    def test_find_markdown__skip_code(self):
+        text = ("@kingmaAdamMethodStochastic2017 and "
+                "`@kingmaAdamMethodStochastic2017`\n\n"
+                "```\n@kingmaAdamMethodStochastic2017\n```\n")
+        result = [match.group() for match in find_markdown(text, self.replacer)]
+        self.assertEqual(['@kingmaAdamMethodStochastic2017'], result)
@@ -1,9 +1,26 @@
-from typing import Iterable, TypeVar
+import json
+import os.path
+from typing import Any, Iterable, TypeVar
 
+from citeproc import STYLES_PATH
 import regex as re
 
 _T = TypeVar("_T")
 
+ROOT_PATH = os.path.abspath(os.path.dirname(__file__))
+BIBLIOGRAPHY_FIXTURES_PATH = os.path.join(ROOT_PATH, 'test_bibliography', 'fixtures')
+BIBLIOGRAPHY_PATH = os.path.join(BIBLIOGRAPHY_FIXTURES_PATH, 'bibliography.json')
+BIBTEX_PATH = os.path.join(BIBLIOGRAPHY_FIXTURES_PATH, 'bibliography.bib')
+TEMPLATES_PATH = os.path.join(BIBLIOGRAPHY_FIXTURES_PATH, 'templates')
+BUNDLED_STYLES = sorted(os.path.splitext(name)[0]
+                        for name in os.listdir(STYLES_PATH)
+                        if name.endswith('.csl'))
+
+
+def load_bibliography(path: str = BIBLIOGRAPHY_PATH) -> list[dict[str, Any]]:
+    with open(path, 'r') as fh:
+        return json.load(fh)
+
 
 def first(it: Iterable[_T], throw: bool = True, default: _T | None = None) -> _T:
     for elem in it: